@@ -11,7 +11,8 @@ Uso:
     python loc_counter.py <caminho>    # caminho é arquivo .py ou diretório
 
 Opções:
-    --json    : saída em JSON
+    --json     : saída em JSON
+    --no-cache : não usa o cache de contagens em ~/.cache/loc_counter
 
 """
 import os
@@ -21,13 +22,101 @@ import tokenize
 import io
 import ast
 import json
-from typing import Set, Tuple, List
+import re
+import hashlib
+import shelve
+import concurrent.futures
+from array import array
+from typing import AbstractSet, Dict, FrozenSet, Set, Tuple, List, Iterator, Optional
+
+try:
+    import orjson
+except ImportError:
+    # Dependência opcional: sem ela usamos o módulo `json` da biblioteca padrão
+    orjson = None
 
 # Observações rápidas sobre dependências:
 # - `os`/`sys` para manipular caminhos e argumentos.
-# - `tokenize` para detectar comentários linha a linha.
+# - `tokenize` para detectar comentários linha a linha (com `re` como caminho
+#   rápido, que resolve a maioria dos arquivos numa única passada).
 # - `ast` para identificar docstrings (strings que aparecem como primeiro nó do corpo).
-# - `json` para saída estruturada quando solicitado.
+# - `json` para saída estruturada quando solicitado (ou `orjson`, mais rápido,
+#   se estiver instalado).
+# - `concurrent.futures` para contar arquivos em paralelo (vários processos).
+# - `shelve` para o cache persistente de contagens entre execuções.
+
+# Diretórios que nunca contêm código do projeto e são pulados na varredura
+# (diretórios ocultos, começando com '.', também são ignorados).
+IGNORED_DIRS = frozenset({'__pycache__', '.git', 'node_modules'})
+
+# Abaixo deste número de arquivos a contagem é feita em série: o custo de
+# iniciar o pool de processos supera o ganho do paralelismo.
+PARALLEL_MIN_FILES = 8
+
+# Literais de string do Python, com aspas triplas antes das simples (como faz o
+# tokenizador). Os laços "desenrolados" mantêm a regex linear mesmo quando a
+# string não tem fechamento. `"{3}` equivale a três aspas duplas seguidas.
+_TRIPLE_STRING_PATTERN = r"""
+    "{3} [^"\\]* (?: (?: \\. | "(?!"") ) [^"\\]* )* "{3}
+  | ''' [^'\\]* (?: (?: \\. | '(?!'') ) [^'\\]* )* '''
+"""
+_SINGLE_STRING_PATTERN = r"""
+    " [^"\\\n]* (?: \\. [^"\\\n]* )* "
+  | ' [^'\\\n]* (?: \\. [^'\\\n]* )* '
+"""
+
+# Regex do caminho rápido de detecção de comentários: numa única passada casa
+# comentários e strings inteiras (para pular '#' dentro delas, inclusive em
+# aspas triplas) e aspas sem fechamento — sinal para voltar ao `tokenize`.
+_FAST_TOKEN_RE = re.compile(r"""
+    (?P<comment>\#[^\r\n]*)
+  | (?:""" + _TRIPLE_STRING_PATTERN + r""")
+  | (?P<unterminated_triple>"{3}|''')
+  | (?:""" + _SINGLE_STRING_PATTERN + r""")
+  | (?P<unterminated>["'])
+""", re.VERBOSE | re.DOTALL)
+
+# Prefixo de f-string (f, rf, fr em qualquer caixa) no fim do texto que antecede
+# uma string. No Python 3.12+ (PEP 701) uma f-string pode reutilizar as próprias
+# aspas dentro de `{}`, o que a regex de strings não acompanha.
+_FSTRING_PREFIX_RE = re.compile(r'(?:\A|\W)(?:[fF][rR]?|[rR][fF])\Z')
+_FSTRINGS_NEST_QUOTES = sys.version_info >= (3, 12)
+
+# Nós que podem ter docstring e nós que podem conter outras instruções
+# (percorridos na busca por docstrings; `match_case` só existe no Python 3.10+).
+_DOCSTRING_NODES = (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)
+_STATEMENT_NODES = (ast.stmt, ast.excepthandler) + ((ast.match_case,) if hasattr(ast, 'match_case') else ())
+
+# Casa fontes cuja primeira instrução (após BOM, linhas vazias e comentários)
+# começa com uma string ou parêntese — ou seja, que podem ter docstring de módulo.
+_MODULE_DOCSTRING_RE = re.compile(r"""\A\ufeff?(?:[ \t\f]*(?:\#[^\n]*)?\n)*[ \t\f]*(?:[rRuU]?["']|\()""")
+
+# Cache em memória de `docstring_line_numbers`, indexado pelo hash (blake2b) do
+# conteúdo do arquivo, com um número máximo de entradas.
+DOCSTRING_CACHE_SIZE = 4096
+_docstring_cache: Dict[bytes, FrozenSet[int]] = {}
+
+# Espaços em branco ASCII removidos com `bytes.translate` para testar se uma
+# linha é vazia (os mesmos que `str.strip` remove, inclusive '\x1f'), e
+# caracteres que `str.splitlines` trata como quebra de linha mas
+# `bytes.splitlines` não (nesses arquivos a contagem usa o texto).
+_BYTES_WHITESPACE = b' \t\r\f\v\x1f'
+_STR_ONLY_BREAKS_RE = re.compile(rb'[\x0b\x0c\x1c-\x1e]')
+
+# Nomes das estatísticas por arquivo, na ordem da tupla de `count_lines_in_file`
+STAT_KEYS = ('total', 'code', 'comments', 'blanks')
+
+# Bloco da saída legível para cada arquivo analisado
+FILE_REPORT = "Arquivo: %s\n  Total: %d  Código: %d  Comentários: %d  Vazias: %d"
+
+# Cache persistente de contagens. O sufixo de versão permite invalidar tudo
+# caso o formato do cache mude.
+CACHE_PATH = os.path.join(os.path.expanduser('~'), '.cache', 'loc_counter', 'v1.db')
+
+# Versão da lógica de contagem, guardada junto de cada entrada do cache (com a
+# versão do Python, já que `ast`/`tokenize` aceitam sintaxes diferentes).
+# Incremente sempre que uma mudança alterar as contagens de algum arquivo.
+COUNTING_VERSION = 4
 
 
 def find_py_files(path: str) -> List[str]:
@@ -35,12 +124,32 @@ def find_py_files(path: str) -> List[str]:
     # Se o usuário passou um arquivo .py, retorna apenas esse arquivo
     if os.path.isfile(path) and path.endswith('.py'):
         return [os.path.abspath(path)]
-    files = []
-    for root, dirs, filenames in os.walk(path):
-        for fn in filenames:
-            if fn.endswith('.py'):
-                files.append(os.path.join(root, fn))
-    return files
+    return list(_iter_py_files(path))
+
+
+def _iter_py_files(directory: str) -> Iterator[str]:
+    """Percorre `directory` recursivamente com `os.scandir`, gerando caminhos `.py`.
+
+    `DirEntry.is_dir`/`is_file` aproveitam o tipo devolvido pelo `readdir`,
+    evitando um `stat` extra por entrada (como acontece com `os.walk`).
+    """
+    try:
+        it = os.scandir(directory)
+    except OSError:
+        # Diretório sem permissão ou removido durante a varredura: ignoramos
+        return
+    with it:
+        for entry in it:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    # Pula diretórios ocultos e caches comuns logo na entrada
+                    if entry.name.startswith('.') or entry.name in IGNORED_DIRS:
+                        continue
+                    yield from _iter_py_files(entry.path)
+                elif entry.name.endswith('.py') and entry.is_file(follow_symlinks=False):
+                    yield entry.path
+            except OSError:
+                continue
 
 
 def interactive_choose(start_dir: str) -> str:
@@ -54,16 +163,22 @@ def interactive_choose(start_dir: str) -> str:
     """
     cur = os.path.abspath(start_dir)
     while True:
+        # Uma única passada com `os.scandir`: o tipo de cada entrada já vem do
+        # `readdir`, sem um `stat` por `os.path.isdir`/`isfile`.
+        dirs = []
+        pythons = []
         try:
-            entries = sorted(os.listdir(cur))
+            with os.scandir(cur) as it:
+                for entry in sorted(it, key=lambda entry: entry.name):
+                    if entry.is_dir():
+                        dirs.append(entry.name)
+                    elif entry.name.endswith('.py') and entry.is_file():
+                        pythons.append(entry.name)
         except Exception as e:
             print(f"Não foi possível listar '{cur}': {e}")
             cur = os.path.dirname(cur)
             continue
 
-        dirs = [e for e in entries if os.path.isdir(os.path.join(cur, e))]
-        pythons = [e for e in entries if os.path.isfile(os.path.join(cur, e)) and e.endswith('.py')]
-
         print(f"\nDiretório: {cur}")
         print("0) Selecionar este diretório")
         print("u) Subir para o diretório pai")
@@ -113,15 +228,34 @@ def interactive_choose(start_dir: str) -> str:
         print("Opção inválida. Tente novamente.")
 
 
-def docstring_line_numbers(source: str) -> Set[int]:
+def docstring_line_numbers(source: str) -> FrozenSet[int]:
     """Retorna um conjunto de números de linha que pertencem a docstrings de
     módulo, classes e funções.
 
     A função analisa o AST e, quando encontra um nó cujo primeiro elemento do
     corpo é uma expressão com uma string (docstring), marca as linhas
-    correspondentes à docstring.
+    correspondentes à docstring. Conteúdos repetidos (ex.: vários `__init__.py`
+    idênticos) reaproveitam o resultado anterior, guardado pelo hash da fonte.
     """
-    lines = source.splitlines()
+    # Sem 'def'/'class' só pode haver docstring de módulo; se o arquivo nem começa
+    # com uma string, evitamos o `ast.parse` (a parte mais cara da análise).
+    # Quando pode haver docstring, o parse é necessário: arquivo com erro de
+    # sintaxe não tem docstrings contadas.
+    if 'def' not in source and 'class' not in source and not _MODULE_DOCSTRING_RE.match(source):
+        return frozenset()
+    key = hashlib.blake2b(source.encode('utf-8', 'surrogatepass'), digest_size=16).digest()
+    doc_lines = _docstring_cache.get(key)
+    if doc_lines is None:
+        doc_lines = frozenset(_parse_docstring_lines(source))
+        if len(_docstring_cache) >= DOCSTRING_CACHE_SIZE:
+            # Limite simples de memória: descarta tudo e recomeça
+            _docstring_cache.clear()
+        _docstring_cache[key] = doc_lines
+    return doc_lines
+
+
+def _parse_docstring_lines(source: str) -> Set[int]:
+    """Constrói o AST de `source` e retorna as linhas ocupadas por docstrings."""
     doc_lines: Set[int] = set()
     # Tenta construir o AST do código fonte. Se não for possível (arquivo inválido),
     # retornamos conjunto vazio — não consideramos docstrings nesse caso.
@@ -130,45 +264,87 @@ def docstring_line_numbers(source: str) -> Set[int]:
     except Exception:
         return doc_lines
 
-    # Percorre a árvore AST buscando nós que podem ter docstrings
-    for node in ast.walk(tree):
-        if isinstance(node, (ast.Module, ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
-            body = getattr(node, 'body', None)
-            if not body:
-                continue
-            first = body[0]
-            # Em Python 3.8+, uma docstring aparece como ast.Expr com ast.Constant contendo uma str
-            if isinstance(first, ast.Expr) and isinstance(getattr(first, 'value', None), ast.Constant) and isinstance(first.value.value, str):
-                start = first.lineno
+    def visit(node: ast.AST) -> None:
+        if isinstance(node, _DOCSTRING_NODES):
+            # `ast.get_docstring` reconhece a string no início do corpo (ast.Constant)
+            docstring_value = ast.get_docstring(node, clean=False)
+            if docstring_value is not None:
+                start = node.body[0].lineno
                 # Calcula quantas linhas a docstring ocupa e marca cada linha
-                docstring_value = first.value.value
                 span = docstring_value.count('\n') + 1
-                for i in range(start, start + span):
-                    doc_lines.add(i)
+                doc_lines.update(range(start, start + span))
+        # Desce apenas por instruções (def/class podem estar dentro de if/try/with...);
+        # expressões nunca contêm docstrings e não precisam ser visitadas.
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, _STATEMENT_NODES):
+                visit(child)
+
+    visit(tree)
     return doc_lines
 
 
-def count_lines_in_file(path: str) -> Tuple[int, int, int, int]:
-    """Conta linhas do arquivo Python ignorando comentários e linhas vazias.
+def _comment_lines_fast(source: str) -> Optional[Set[int]]:
+    """Detecta linhas com comentário numa única passada de regex.
 
-    Retorna tupla: (total, code, comments, blanks)
+    A regex consome strings inteiras (de aspas simples ou triplas), então um
+    '#' só é tratado como comentário fora delas. Devolve `None` quando encontra
+    algo que não sabe tratar (string não terminada, ou f-string cortada por
+    aspas reutilizadas no Python 3.12+), para cair no `tokenize`.
     """
-    # Lê todo o conteúdo do arquivo como texto (UTF-8). Se houver erro aqui,
-    # deixamos a exceção propagar para que o chamador possa decidir o que fazer.
-    try:
-        with open(path, 'r', encoding='utf-8') as f:
-            source = f.read()
-    except Exception as e:
-        raise
-
-    lines = source.splitlines()
-    total = len(lines)
+    comment_lines: Set[int] = set()
+    lineno = 1
+    pos = 0
+    for m in _FAST_TOKEN_RE.finditer(source):
+        if m.lastgroup is None:
+            # String. Se é uma f-string com `{`/`}` desbalanceadas, a regex a
+            # encerrou numa aspa reutilizada dentro de `{}` (ex.: f"{d["#"]}")
+            if _FSTRINGS_NEST_QUOTES:
+                text = m.group()
+                if text.count('{') != text.count('}'):
+                    start = m.start()
+                    if _FSTRING_PREFIX_RE.search(source[max(0, start - 3):start]):
+                        return None
+            continue
+        if m.lastgroup in ('unterminated', 'unterminated_triple'):
+            return None
+        if m.lastgroup == 'comment':
+            # Avança a contagem de linhas só até este comentário (em C, via str.count).
+            # Como os comentários vêm em ordem, cada trecho do texto é contado uma
+            # única vez: a conversão posição → linha custa O(N) no total, sem
+            # precisar de um índice de quebras de linha com busca binária.
+            start = m.start()
+            lineno += source.count('\n', pos, start)
+            pos = start
+            comment_lines.add(lineno)
+    return comment_lines
+
+
+def comment_line_numbers(source: str, source_bytes: Optional[bytes] = None) -> Set[int]:
+    """Retorna o conjunto de números de linha que contêm comentários '#'.
+
+    Usa primeiro um caminho rápido baseado em regex; quando a regex não é
+    conclusiva (string sem fechamento), recorre ao módulo `tokenize`.
+    Se `source_bytes` (o conteúdo bruto do arquivo, com as mesmas linhas de
+    `source`) for informado, o `tokenize` lê direto dele, sem criar uma cópia
+    do texto num `io.StringIO`.
+    """
+    # Sem nenhum '#' não há comentários: dispensa regex e `tokenize`
+    if '#' not in source:
+        return set()
+    comment_lines = _comment_lines_fast(source)
+    if comment_lines is not None:
+        return comment_lines
 
     # Detecta comentários de linha usando o gerador de tokens. Cada token do tipo
     # COMMENT fornece a linha onde o comentário está — marcamos essas linhas.
-    comment_lines: Set[int] = set()
+    comment_lines = set()
     try:
-        token_gen = tokenize.generate_tokens(io.StringIO(source).readline)
+        if source_bytes is not None:
+            # `io.BytesIO` compartilha o buffer dos bytes; a codificação é
+            # detectada pelo próprio `tokenize` (BOM/cookie da PEP 263)
+            token_gen = tokenize.tokenize(io.BytesIO(source_bytes).readline)
+        else:
+            token_gen = tokenize.generate_tokens(io.StringIO(source).readline)
         for tok_type, tok_string, start, end, _ in token_gen:
             if tok_type == tokenize.COMMENT:
                 lineno = start[0]
@@ -177,46 +353,202 @@ def count_lines_in_file(path: str) -> Tuple[int, int, int, int]:
         # Em casos raros (arquivos malformados), tokenize pode falhar; ignoramos
         # e continuamos sem marcar comentários via tokenize.
         pass
+    return comment_lines
+
+
+def _blank_line_numbers(source_bytes: bytes, source: str) -> Tuple[int, Set[int]]:
+    """Retorna (total de linhas, conjunto das linhas vazias).
+
+    Para arquivos ASCII sem separadores "exóticos", trabalha direto nos bytes:
+    `bytes.splitlines` e `bytes.translate` são laços em C e dispensam o `strip`
+    de texto. Nos demais casos `str.splitlines`/`str.strip` reconhecem quebras
+    e espaços Unicode que os bytes não veem, então usamos o texto decodificado.
+    """
+    if source_bytes.isascii() and not _STR_ONLY_BREAKS_RE.search(source_bytes):
+        byte_lines = source_bytes.splitlines()
+        blank_lines = {idx for idx, raw in enumerate(byte_lines, start=1) if not raw.translate(None, _BYTES_WHITESPACE)}
+        return len(byte_lines), blank_lines
+    lines = source.splitlines()
+    return len(lines), {idx for idx, raw in enumerate(lines, start=1) if not raw.strip()}
+
+
+def classify_lines(total: int, blank_lines: Set[int], comment_lines: Set[int], doc_lines: AbstractSet[int]) -> Tuple[int, int, int]:
+    """Classifica as `total` linhas de um arquivo em código, comentário ou vazia.
+
+    Recebe os números de linha (a partir de 1) de cada categoria e retorna a
+    tupla (code, comments, blanks). Linha vazia tem precedência sobre comentário.
+    """
+    # Operações de conjunto (implementadas em C) em vez de um if/elif por linha
+    blanks = len(blank_lines)
+    # A interseção com o intervalo descarta linhas fora do arquivo (ex.: docstring
+    # com '\n' escapado na última linha), como o laço original fazia.
+    marked = (comment_lines | doc_lines) - blank_lines
+    comments = len(marked.intersection(range(1, total + 1)))
+    code = total - blanks - comments
+    return code, comments, blanks
+
+
+def count_lines_in_file(path: str) -> Tuple[int, int, int, int]:
+    """Conta linhas do arquivo Python ignorando comentários e linhas vazias.
+
+    Retorna tupla: (total, code, comments, blanks)
+    """
+    # Lê o conteúdo como bytes e decodifica uma única vez (UTF-8). Se houver erro
+    # aqui, deixamos a exceção propagar para que o chamador possa decidir o que fazer.
+    with open(path, 'rb') as f:
+        source_bytes = f.read()
+    source = source_bytes.decode('utf-8')
+    # Bytes que o `tokenize` pode ler diretamente; `None` se as linhas não batem
+    token_bytes: Optional[bytes] = source_bytes
+    if '\r' in source:
+        # Mesma normalização de quebras de linha que a leitura em modo texto faz
+        if source.count('\r') != source.count('\r\n'):
+            # '\r' isolado: só o texto normalizado tem a numeração de linhas correta
+            token_bytes = None
+        source = source.replace('\r\n', '\n').replace('\r', '\n')
+
+    total, blank_lines = _blank_line_numbers(source_bytes, source)
+
+    # Detecta as linhas que contêm comentários '#'
+    comment_lines = comment_line_numbers(source, token_bytes)
 
     # Detecta docstrings analisando o AST (linhas ocupadas pelas docstrings)
     doc_lines = docstring_line_numbers(source)
 
-    code = 0
-    comments = 0
-    blanks = 0
-
-    # Percorre todas as linhas e classifica cada uma em código, comentário ou vazia
-    for idx, raw in enumerate(lines, start=1):
-        stripped = raw.strip()
-        if stripped == '':
-            blanks += 1
-        elif idx in comment_lines or idx in doc_lines:
-            comments += 1
-        else:
-            code += 1
-
+    code, comments, blanks = classify_lines(total, blank_lines, comment_lines, doc_lines)
     return total, code, comments, blanks
 
 
-def analyze(path: str) -> dict:
-    """Analisa um caminho (arquivo ou diretório) e agrega estatísticas."""
-    files = find_py_files(path)
-    results = {}
-    agg = {'files': 0, 'total': 0, 'code': 0, 'comments': 0, 'blanks': 0}
-    # Para cada arquivo Python encontrado, conta as linhas e acumula os totais
-    for f in sorted(files):
+def _count_safe(path: str) -> Optional[Tuple[int, int, int, int]]:
+    """Versão de `count_lines_in_file` que nunca levanta exceção.
+
+    Usada pelos processos do pool: devolve `None` quando o arquivo não pode ser
+    lido/parseado, para que nenhum erro atravesse a fronteira entre processos.
+    """
+    try:
+        return count_lines_in_file(path)
+    except Exception:
+        return None
+
+
+def _count_all(files: List[str]) -> Iterator[Optional[Tuple[int, int, int, int]]]:
+    """Conta as linhas de cada arquivo, em paralelo quando compensa.
+
+    Cada arquivo é independente (e a contagem é limitada por CPU), então
+    distribuímos o trabalho num `ProcessPoolExecutor`. Para poucos arquivos o
+    custo de subir o pool não se paga e processamos em série — o mesmo vale
+    quando o pool não pode ser usado nesta plataforma ou um processo morre.
+    """
+    if len(files) < PARALLEL_MIN_FILES:
+        return map(_count_safe, files)
+    workers = os.cpu_count() or 1
+    # Agrupa arquivos por tarefa para amortizar o custo de comunicação (IPC)
+    chunksize = max(1, len(files) // (workers * 4))
+    try:
+        with concurrent.futures.ProcessPoolExecutor() as ex:
+            # `list` consome o iterador antes de o pool ser encerrado
+            return iter(list(ex.map(_count_safe, files, chunksize=chunksize)))
+    except (NotImplementedError, OSError, concurrent.futures.BrokenExecutor):
+        # Sem `sem_open` funcional, ou pool quebrado (BrokenProcessPool): em série
+        return iter(list(map(_count_safe, files)))
+
+
+def _open_cache() -> Optional[shelve.Shelf]:
+    """Abre o cache persistente de contagens; devolve `None` se não for possível."""
+    try:
+        os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+        return shelve.open(CACHE_PATH)
+    except Exception:
+        # Diretório sem permissão, banco corrompido ou em uso: seguimos sem cache
+        return None
+
+
+def _count_with_cache(files: List[str], cache: Optional[shelve.Shelf]) -> List[Optional[Tuple[int, int, int, int]]]:
+    """Conta as linhas dos arquivos reaproveitando o cache quando possível.
+
+    O cache é indexado pelo caminho absoluto e guarda `(mtime_ns, tamanho)`,
+    a versão do Python e `COUNTING_VERSION` junto da contagem; se nada mudou,
+    basta um `stat` para reutilizá-la. Só os arquivos ausentes ou alterados
+    passam por `_count_all`.
+    """
+    if cache is None:
+        return list(_count_all(files))
+    stats: List[Optional[Tuple[int, int, int, int]]] = [None] * len(files)
+    pending = []
+    for i, f in enumerate(files):
         try:
-            total, code, comments, blanks = count_lines_in_file(f)
-        except Exception as e:
+            st = os.stat(f)
+            key = os.path.abspath(f)
+            signature = (st.st_mtime_ns, st.st_size, sys.version_info[:2], COUNTING_VERSION)
+            entry = cache.get(key)
+        except Exception:
+            # Arquivo sumiu ou entrada ilegível no cache: recalculamos
+            pending.append((i, None, None))
+            continue
+        if entry is not None and entry[0] == signature:
+            stats[i] = entry[1]
+        else:
+            pending.append((i, key, signature))
+
+    counted = _count_all([files[i] for i, _, _ in pending])
+    for (i, key, signature), result in zip(pending, counted):
+        stats[i] = result
+        # Falhas não são guardadas, para serem tentadas de novo na próxima execução
+        if result is not None and key is not None:
+            try:
+                cache[key] = (signature, result)
+            except Exception:
+                # O cache é só otimização: erro de escrita (disco cheio, banco
+                # somente leitura) não deve interromper a análise
+                pass
+    return stats
+
+
+def analyze(path: str, use_cache: bool = True) -> dict:
+    """Analisa um caminho (arquivo ou diretório) e agrega estatísticas.
+
+    Com `use_cache`, contagens de arquivos inalterados são lidas do cache em
+    disco (`CACHE_PATH`) em vez de recalculadas. Os arquivos ficam em ordem
+    alfabética de caminho.
+
+    Retorna um dicionário em colunas: `paths` (lista de caminhos), `columns`
+    (um `array` de inteiros por estatística de `STAT_KEYS`, alinhado com
+    `paths`) e `aggregate` (totais). Use `per_file_stats` para obter o formato
+    `{caminho: {...}}` da saída JSON.
+    """
+    files = find_py_files(path)
+    # Ordem da varredura (`os.scandir`) depende do sistema de arquivos; ordena no
+    # próprio lugar para a saída ser determinística
+    files.sort()
+    cache = _open_cache() if use_cache else None
+    try:
+        counts = _count_with_cache(files, cache)
+    finally:
+        if cache is not None:
+            cache.close()
+    # Acumula as contagens em colunas (uma lista de caminhos e um `array` de
+    # inteiros por estatística) em vez de um dicionário por arquivo; os totais
+    # saem de `sum` sobre cada coluna.
+    paths: List[str] = []
+    columns = {key: array('i') for key in STAT_KEYS}
+    # Para cada arquivo Python encontrado, guarda as contagens nas colunas
+    for f, stats in zip(files, counts):
+        if stats is None:
             # Se não conseguimos ler/parsear um arquivo, apenas o ignoramos
             continue
-        results[f] = {'total': total, 'code': code, 'comments': comments, 'blanks': blanks}
-        agg['files'] += 1
-        agg['total'] += total
-        agg['code'] += code
-        agg['comments'] += comments
-        agg['blanks'] += blanks
-    return {'files': results, 'aggregate': agg}
+        paths.append(f)
+        for key, value in zip(STAT_KEYS, stats):
+            columns[key].append(value)
+
+    agg = {'files': len(paths)}
+    agg.update((key, sum(columns[key])) for key in STAT_KEYS)
+    return {'paths': paths, 'columns': columns, 'aggregate': agg}
+
+
+def per_file_stats(res: dict) -> dict:
+    """Converte as colunas de `analyze` no formato `{caminho: {'total': ..., ...}}`."""
+    columns = [res['columns'][key] for key in STAT_KEYS]
+    return {f: dict(zip(STAT_KEYS, row)) for f, *row in zip(res['paths'], *columns)}
 
 
 def main(argv=None):
@@ -224,6 +556,7 @@ def main(argv=None):
     parser = argparse.ArgumentParser(description='Conta linhas de código Python (ignora comentários e linhas vazias).')
     parser.add_argument('path', nargs='?', default=None, help='Arquivo .py ou diretório a analisar (se omitido, modo interativo)')
     parser.add_argument('--json', action='store_true', help='Imprime saída em JSON')
+    parser.add_argument('--no-cache', action='store_true', help='Ignora o cache de contagens em disco')
     args = parser.parse_args(argv)
 
     path = args.path
@@ -238,19 +571,37 @@ def main(argv=None):
         sys.exit(2)
 
     # Executa a análise e exibe o resultado em JSON ou em formato legível
-    res = analyze(path)
+    res = analyze(path, use_cache=not args.no_cache)
     if args.json:
-        print(json.dumps(res, indent=2, ensure_ascii=False))
+        # O formato por arquivo só é montado aqui, para a serialização
+        out = {'files': per_file_stats(res), 'aggregate': res['aggregate']}
+        buffer = getattr(sys.stdout, 'buffer', None)
+        if orjson is not None and buffer is not None:
+            try:
+                data = orjson.dumps(out, option=orjson.OPT_INDENT_2 | orjson.OPT_APPEND_NEWLINE)
+            except orjson.JSONEncodeError:
+                # Ex.: nome de arquivo que não é UTF-8 válido (surrogates); o
+                # módulo `json` consegue serializá-lo
+                data = None
+            if data is not None:
+                # orjson já gera UTF-8: escreve os bytes direto, sem recodificar via print
+                sys.stdout.flush()
+                buffer.write(data)
+                buffer.flush()
+                return
+        print(json.dumps(out, indent=2, ensure_ascii=False))
         return
 
-    # Impressão legível: por arquivo e agregados ao final
+    # Impressão legível: por arquivo e agregados ao final. Monta todo o texto
+    # antes e escreve de uma vez, em vez de dois `print` por arquivo.
     agg = res['aggregate']
-    for f, stats in res['files'].items():
-        print(f"Arquivo: {f}")
-        print(f"  Total: {stats['total']}  Código: {stats['code']}  Comentários: {stats['comments']}  Vazias: {stats['blanks']}")
-    print('---')
-    print(f"Arquivos analisados: {agg['files']}")
-    print(f"Total linhas: {agg['total']}  Código: {agg['code']}  Comentários: {agg['comments']}  Vazias: {agg['blanks']}")
+    columns = [res['columns'][key] for key in STAT_KEYS]
+    parts = [FILE_REPORT % row for row in zip(res['paths'], *columns)]
+    parts.append('---')
+    parts.append(f"Arquivos analisados: {agg['files']}")
+    parts.append(f"Total linhas: {agg['total']}  Código: {agg['code']}  Comentários: {agg['comments']}  Vazias: {agg['blanks']}")
+    parts.append('')
+    sys.stdout.write('\n'.join(parts))
 
 
 if __name__ == '__main__':
@@ -0,0 +1,194 @@
+"""Testes de regressão do contador de linhas (`python -m unittest`)."""
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import loc_counter
+
+
+def count_source(source: str):
+    """Grava `source` num arquivo temporário e retorna a contagem dele."""
+    fd, path = tempfile.mkstemp(suffix='.py')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8', newline='') as f:
+            f.write(source)
+        return loc_counter.count_lines_in_file(path)
+    finally:
+        os.remove(path)
+
+
+class CountLinesTest(unittest.TestCase):
+
+    def test_syntax_error_has_no_docstrings(self):
+        # Sem AST válido não há docstrings, com ou sem 'def' no arquivo
+        self.assertEqual(count_source('"""doc\nmore"""\nx = (\n'), (3, 3, 0, 0))
+        self.assertEqual(count_source('"""doc\nmore"""\ndef f(\n'), (3, 3, 0, 0))
+
+    def test_unit_separator_line_is_blank(self):
+        # str.strip remove '\x1f'; o caminho em bytes precisa fazer o mesmo
+        self.assertEqual(count_source('x = 1\n\x1f\ny = 2\n'), (3, 2, 0, 1))
+
+    def test_crlf_and_lone_cr_line_endings(self):
+        self.assertEqual(count_source('x = 1\r\n\r\n# c\r\ny = 2\r\n'), (4, 2, 1, 1))
+        self.assertEqual(count_source('x = 1\r\r# c\ry = 2\r'), (4, 2, 1, 1))
+
+    def test_separators_only_str_splits_on(self):
+        # '\x0c' e '\x1c' quebram linha em str.splitlines: contagem pelo texto
+        self.assertEqual(count_source('x = 1\n\x0c\ny = 2\n'), (4, 2, 0, 2))
+        self.assertEqual(count_source('x = 1\n\x1c\ny = 2\n'), (4, 2, 0, 2))
+
+    def test_non_ascii_whitespace_is_blank(self):
+        self.assertEqual(count_source('x = "é"  # ç\n\u3000\n\xa0\n'), (3, 0, 1, 2))
+
+    def assertComments(self, source, expected):
+        """Confere o caminho rápido (regex) e o resultado final da detecção."""
+        self.assertEqual(loc_counter._comment_lines_fast(source), expected)
+        self.assertEqual(loc_counter.comment_line_numbers(source), expected)
+
+    def test_hash_inside_strings_is_not_comment(self):
+        self.assertComments("x = '#a'\ny = \"#b\"  # c\n", {2})
+        self.assertComments('s = """a\n# não\n"""\nt = 1\n', set())
+        self.assertComments("s = '''a\n# não\n'''\nt = 1\n", set())
+
+    def test_triple_quoted_string_followed_by_comment(self):
+        self.assertComments("x = '''doc'''  # real\n", {1})
+        self.assertEqual(count_source("x = '''a\nb'''  # real\ny = 1\n"), (3, 2, 1, 0))
+
+    def test_escaped_quotes(self):
+        self.assertComments('x = "a\\"#"  # c\n', {1})
+        self.assertComments("y = 'it\\'s # não'\n", set())
+
+    def test_string_continued_with_backslash(self):
+        # A string continua na linha seguinte: o '#' faz parte dela
+        self.assertComments('x = "\\\n#"\n', set())
+
+    def test_unterminated_string_falls_back_to_tokenize(self):
+        self.assertIsNone(loc_counter._comment_lines_fast('# c\nx = "abc\n'))
+        self.assertEqual(loc_counter.comment_line_numbers('# c\nx = "abc\n'), {1})
+        self.assertIsNone(loc_counter._comment_lines_fast("x = '''abc\n# c\n"))
+        self.assertEqual(loc_counter.comment_line_numbers("x = '''abc\n# c\n"), set())
+
+    @unittest.skipUnless(sys.version_info >= (3, 12), 'aspas reutilizadas em f-string exigem Python 3.12+ (PEP 701)')
+    def test_fstring_reusing_quotes_is_code(self):
+        # '#' dentro de f"{...}" não é comentário
+        self.assertEqual(count_source('x = f"{d["#"]}"\ny = 1\n'), (2, 2, 0, 0))
+        self.assertIsNone(loc_counter._comment_lines_fast('x = rf"{d["#"]}"\n'))
+
+    def test_balanced_fstrings_stay_on_fast_path(self):
+        self.assertComments("x = f'{a}#b'  # c\ny = 'f'\nz = F\"{{#}}\"\n", {1})
+        # Sem prefixo de f-string, chaves desbalanceadas não importam
+        self.assertComments("x = '{#'  # c\nif'{':\n    pass\n", {1})
+
+
+
+class CacheTest(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.project = os.path.join(tmp.name, 'projeto')
+        os.mkdir(self.project)
+        self.source = os.path.join(self.project, 'mod.py')
+        with open(self.source, 'w', encoding='utf-8') as f:
+            f.write('x = 1\n\n# c\n')
+        self.cache_dir = os.path.join(tmp.name, 'cache')
+        patcher = mock.patch.object(loc_counter, 'CACHE_PATH', os.path.join(self.cache_dir, 'v1.db'))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def analyze(self, **kwargs):
+        """Roda `analyze` e retorna (agregado, nº de arquivos realmente contados)."""
+        with mock.patch.object(loc_counter, 'count_lines_in_file', wraps=loc_counter.count_lines_in_file) as counter:
+            res = loc_counter.analyze(self.project, **kwargs)
+        return res['aggregate'], counter.call_count
+
+    def test_second_run_reuses_entry(self):
+        first, calls = self.analyze()
+        self.assertEqual(calls, 1)
+        second, calls = self.analyze()
+        self.assertEqual(calls, 0)
+        self.assertEqual(first, second)
+        self.assertEqual(second['code'], 1)
+
+    def test_mtime_change_recounts(self):
+        self.analyze()
+        st = os.stat(self.source)
+        os.utime(self.source, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        self.assertEqual(self.analyze()[1], 1)
+
+    def test_size_change_recounts(self):
+        self.analyze()
+        st = os.stat(self.source)
+        with open(self.source, 'a', encoding='utf-8') as f:
+            f.write('y = 2\n')
+        # Mesmo mtime: só o tamanho denuncia a mudança
+        os.utime(self.source, ns=(st.st_atime_ns, st.st_mtime_ns))
+        agg, calls = self.analyze()
+        self.assertEqual(calls, 1)
+        self.assertEqual(agg['code'], 2)
+
+    def test_counting_version_change_recounts(self):
+        self.analyze()
+        with mock.patch.object(loc_counter, 'COUNTING_VERSION', loc_counter.COUNTING_VERSION + 1):
+            self.assertEqual(self.analyze()[1], 1)
+
+    def test_no_cache_never_creates_db(self):
+        agg, calls = self.analyze(use_cache=False)
+        self.assertEqual(calls, 1)
+        self.assertEqual(agg['total'], 3)
+        self.assertFalse(os.path.exists(self.cache_dir))
+
+    def test_unwritable_cache_dir_still_counts(self):
+        # Um arquivo comum no lugar do diretório do cache: não dá para criá-lo
+        with open(self.cache_dir, 'w') as f:
+            f.write('')
+        agg, calls = self.analyze()
+        self.assertEqual(calls, 1)
+        self.assertEqual((agg['total'], agg['code'], agg['comments'], agg['blanks']), (3, 1, 1, 1))
+
+
+
+class _FailingOrjson:
+    """Substituto do `orjson` cujo `dumps` sempre falha ao serializar."""
+    OPT_INDENT_2 = OPT_APPEND_NEWLINE = 0
+
+    class JSONEncodeError(TypeError):
+        pass
+
+    @classmethod
+    def dumps(cls, obj, option=0):
+        raise cls.JSONEncodeError('str is not valid UTF-8: surrogates not allowed')
+
+
+class JsonOutputTest(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'example.py')
+
+    def run_json(self, stdout):
+        with contextlib.redirect_stdout(stdout):
+            loc_counter.main([self.path, '--json', '--no-cache'])
+
+    def test_stdout_without_buffer(self):
+        stdout = io.StringIO()
+        self.run_json(stdout)
+        res = json.loads(stdout.getvalue())
+        self.assertEqual(res['aggregate']['files'], 1)
+        self.assertIn(self.path, res['files'])
+
+    def test_orjson_encode_error_falls_back_to_json(self):
+        stdout = io.TextIOWrapper(io.BytesIO(), encoding='utf-8')
+        with mock.patch.object(loc_counter, 'orjson', _FailingOrjson):
+            self.run_json(stdout)
+        stdout.flush()
+        res = json.loads(stdout.buffer.getvalue().decode('utf-8'))
+        self.assertEqual(res['aggregate']['files'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()